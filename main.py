@@ -2,18 +2,32 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import atexit
+import copy
 import json
 import os
 import random
 import re
+import sqlite3
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from http.cookiejar import LoadError, MozillaCookieJar
+from typing import Any, AsyncIterator, Dict, List, Optional
 from urllib.parse import urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from lxml import etree
+from lxml import html as lxml_html
+from pybloom_live import ScalableBloomFilter
+
+try:
+    import orjson
+except ImportError:  # fallback a la stdlib si orjson no está instalado
+    orjson = None
 
 ###############################################################################
 # utilidades de logging
@@ -24,6 +38,73 @@ def _printv(*args, _verbose: bool = False, **kwargs):
     if _verbose:
         print(*args, **kwargs)
 
+###############################################################################
+# utilidades de JSON
+###############################################################################
+
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serializa en una línea, UTF-8 sin escapar (misma salida con o sin orjson)."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+###############################################################################
+# utilidades numéricas
+###############################################################################
+
+_MILES_STRIP = str.maketrans('', '', '.')
+
+
+def _parse_miles(valor) -> int:
+    """Convierte un string con separador de miles o un int a entero."""
+    return 0 if valor is None else int(str(valor).translate(_MILES_STRIP))
+
+
+def _format_miles(numero: int) -> str:
+    """Formatea un entero con punto como separador de miles."""
+    return f"{numero:_}".replace("_", ".")
+
+###############################################################################
+# utilidades de XPath
+###############################################################################
+
+def _xp_clase(clase: str) -> str:
+    """Predicado XPath equivalente al selector CSS `.clase` (token exacto)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {clase} ')"
+
+
+def _texto_nodo(nodo) -> str:
+    """Equivalente a `get_text(" ", strip=True)` de BeautifulSoup para lxml."""
+    return " ".join(t.strip() for t in nodo.itertext() if t.strip())
+
+###############################################################################
+# limitador de tasa compartido entre hilos
+###############################################################################
+
+class _LimitadorTasa:
+    """Token bucket mínimo: espacia las requests a `por_segundo` en total."""
+
+    def __init__(self, por_segundo: float):
+        self._intervalo = 1.0 / por_segundo
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def _reservar(self) -> float:
+        """Reserva el próximo turno y devuelve cuántos segundos faltan para él."""
+        with self._lock:
+            ahora = time.monotonic()
+            espera = self._proximo - ahora
+            self._proximo = max(ahora, self._proximo) + self._intervalo
+        return espera
+
+    async def esperar_async(self) -> None:
+        if (espera := self._reservar()) > 0:
+            await asyncio.sleep(espera)
+
 ###############################################################################
 # clase principal
 ###############################################################################
@@ -38,6 +119,16 @@ class BuscadorMercadoLibre:
         "{query_barrio}_PriceRange_{precio_minimo}UYU-{precio_maximo}UYU{filtro_fecha}_NoIndex_True"
     )
 
+    # barrios scrapeados en paralelo (I/O-bound, acotado para no abusar)
+    MAX_HILOS_BARRIOS = 4
+    # páginas individuales (gastos comunes) concurrentes por página de listado
+    MAX_DETALLES_CONCURRENTES = 8
+    # tope global de requests a páginas individuales por segundo
+    MAX_DETALLES_POR_SEG = 2.0
+    # reintentos con backoff exponencial ante estos status
+    REINTENTOS = 3
+    ESTADOS_REINTENTO = frozenset({429, 500, 502, 503, 504})
+
     # ---------------------------------------------------------------------
     # life‑cycle
     # ---------------------------------------------------------------------
@@ -52,14 +143,22 @@ class BuscadorMercadoLibre:
         self.url_config = config['url_config']
         self.duplicados_config = config['duplicados']
         self.max_paginas = config['max_paginas']
-        self.obtener_gastos_comunes = config['gastos_comunes']['obtener_gastos_comunes']
+        self.archivo_cookies = config['archivo_cookies']
+        self.gastos_config = config['gastos_comunes']
+        self.obtener_gastos_comunes = self.gastos_config['obtener_gastos_comunes']
 
         # Configurar valores basados en la configuración
         self.max_precio = int(self.url_config['precio_maximo'])
         self.dormitorios = int(self.url_config['numero_dormitorios'])
 
-        # Cargar apartamentos ya visitados
+        # Cargar apartamentos ya visitados (compartidos entre hilos)
+        self._lock_visitados = threading.RLock()
+        self._visitados_modificado = False
+        self._persistir_bloom = True
+        self._visited_fh = None  # se abre al primer guardado, escritura con buffer
         self.apartamentos_visitados = self._cargar_apartamentos_visitados()
+        atexit.register(self._guardar_bloom_visitados)
+        atexit.register(self._cerrar_archivo_visitados)
 
         # headers / user‑agent rotation
         self._user_agents = [
@@ -71,8 +170,38 @@ class BuscadorMercadoLibre:
             "Firefox/128.0",
         ]
 
-        self.session = requests.Session()
+        # cookies persistidas entre ejecuciones (p.ej. el clearance anti-bot)
+        self._cookie_jar = self._cargar_cookies()
+        atexit.register(self._guardar_cookies)
+
+        # HTTP/2: los hilos multiplexan sobre pocas conexiones en vez de una TCP+TLS c/u;
+        # el transporte reintenta errores de conexión, los status se reintentan en _espera_reintento
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=self.REINTENTOS,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            ),
+            cookies=self._cookie_jar,
+            timeout=30,
+            follow_redirects=True,
+        )
+        atexit.register(self._cerrar_clientes)
+
+        # loop + AsyncClient únicos para las páginas individuales (se crean al primer uso)
+        self._lock_loop = threading.Lock()
+        self._loop_gastos: Optional[asyncio.AbstractEventLoop] = None
+        self._client_async: Optional[httpx.AsyncClient] = None
+        self._sem_gastos: Optional[asyncio.Semaphore] = None
+        # un único User-Agent por sesión: rotarlo con las mismas cookies parece más bot
         self._actualizar_headers()
+        self._limitador_detalles = _LimitadorTasa(self.MAX_DETALLES_POR_SEG)
+
+        # Cache persistente url → gastos comunes (compartida entre hilos)
+        self._lock_cache_gastos = threading.Lock()
+        self._cache_pendientes: List[tuple[str, Optional[int], int]] = []
+        self._cache_gastos = self._abrir_cache_gastos() if self.obtener_gastos_comunes else None
+        atexit.register(self._cerrar_cache_gastos)
 
     def _cargar_configuracion(self, config_file: str) -> Dict[str, Any]:
         """Carga la configuración desde el archivo JSON."""
@@ -81,8 +210,8 @@ class BuscadorMercadoLibre:
                 _printv(f"❌ Archivo de configuración {config_file} no encontrado", _verbose=self.verbose)
                 sys.exit(1)
 
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            with open(config_file, 'rb') as f:
+                config = _json_loads(f.read())
 
             barrios = config.get('barrios', {})
             if not barrios:
@@ -108,6 +237,8 @@ class BuscadorMercadoLibre:
 
             max_paginas = config.get('max_paginas', 3)  # valor por defecto 3
 
+            archivo_cookies = config.get('archivo_cookies', 'cookies.txt')
+
             _printv(f"✅ Configuración cargada: {len(barrios)} barrios, {len(palabras_excluir)} palabras a excluir, max {max_paginas} páginas", _verbose=self.verbose)
             return {
                 'barrios': barrios,
@@ -115,7 +246,8 @@ class BuscadorMercadoLibre:
                 'url_config': url_config,
                 'duplicados': duplicados_config,
                 'gastos_comunes': gastos_comunes_config,
-                'max_paginas': max_paginas
+                'max_paginas': max_paginas,
+                'archivo_cookies': archivo_cookies
             }
 
         except json.JSONDecodeError as e:
@@ -125,43 +257,214 @@ class BuscadorMercadoLibre:
             _printv(f"❌ Error cargando configuración: {e}", _verbose=self.verbose)
             sys.exit(1)
 
-    def _cargar_apartamentos_visitados(self) -> set:
-        """Carga las URLs de apartamentos ya visitados."""
+    def _archivos_historial(self) -> tuple[str, str]:
+        """Devuelve (archivo de URLs visitadas, archivo del Bloom filter)."""
+        archivo = self.duplicados_config.get('archivo_visitados', 'apartamentos_visitados.txt')
+        archivo_bloom = self.duplicados_config.get('archivo_bloom', os.path.splitext(archivo)[0] + '.bloom')
+        return archivo, archivo_bloom
+
+    @staticmethod
+    def _nuevo_bloom() -> ScalableBloomFilter:
+        return ScalableBloomFilter(
+            initial_capacity=100_000,
+            error_rate=1e-4,
+            mode=ScalableBloomFilter.SMALL_SET_GROWTH,
+        )
+
+    @staticmethod
+    def _bloom_valido(bloom: ScalableBloomFilter) -> bool:
+        """`fromfile` acepta bytes arbitrarios: verifica parámetros y que el filtro funcione."""
+        try:
+            if not (0 < bloom.error_rate < 1 and 0 < bloom.ratio < 1):
+                return False
+            if bloom.initial_capacity <= 0 or bloom.scale < 2:
+                return False
+            prueba = copy.deepcopy(bloom)
+            prueba.add("__prueba__")
+            return "__prueba__" in prueba
+        except Exception:
+            return False
+
+    def _cargar_apartamentos_visitados(self) -> ScalableBloomFilter:
+        """Carga el Bloom filter de apartamentos ya visitados.
+
+        Si el .bloom no existe, no es válido o es más viejo que el .txt, se reconstruye a partir del .txt
+        (historial previo) y se persiste para que la próxima ejecución no vuelva a leerlo.
+        """
         if not self.duplicados_config.get('filtrar_duplicados', True):
-            return set()
+            return self._nuevo_bloom()
+
+        archivo, archivo_bloom = self._archivos_historial()
+        # un .txt más nuevo que el .bloom (corte sin atexit, edición a mano) manda
+        txt_mas_nuevo = os.path.exists(archivo) and os.path.exists(archivo_bloom) and \
+            os.path.getmtime(archivo) > os.path.getmtime(archivo_bloom)
+        if txt_mas_nuevo:
+            _printv(f"📝 {archivo} cambió después de {archivo_bloom}, se reconstruye el filtro", _verbose=self.verbose)
+        elif os.path.exists(archivo_bloom):
+            try:
+                with open(archivo_bloom, 'rb') as f:
+                    bloom = ScalableBloomFilter.fromfile(f)
+                if self._bloom_valido(bloom):
+                    _printv(f"✅ Cargado filtro con {len(bloom)} apartamentos visitados", _verbose=self.verbose)
+                    return bloom
+                _printv(f"⚠️  Filtro {archivo_bloom} inválido, se reconstruye desde {archivo}", _verbose=self.verbose)
+            except Exception as e:
+                _printv(f"⚠️  Error cargando {archivo_bloom} ({e!r}), se reconstruye desde {archivo}", _verbose=self.verbose)
+
+        return self._reconstruir_bloom(archivo)
+
+    def _reconstruir_bloom(self, archivo: str) -> ScalableBloomFilter:
+        """Arma el filtro desde el .txt de URLs visitadas y lo persiste."""
+        bloom = self._nuevo_bloom()
+        if not os.path.exists(archivo):
+            _printv(f"📝 Archivo {archivo} no existe, se creará al guardar nuevos apartamentos", _verbose=self.verbose)
+            return bloom
 
-        archivo = self.duplicados_config.get('archivo_visitados', 'apartamentos_visitados.txt')
         try:
-            if os.path.exists(archivo):
-                with open(archivo, 'r', encoding='utf-8') as f:
-                    urls = {line.strip() for line in f if line.strip()}
-                _printv(f"✅ Cargadas {len(urls)} URLs de apartamentos visitados", _verbose=self.verbose)
-                return urls
-            else:
-                _printv(f"📝 Archivo {archivo} no existe, se creará al guardar nuevos apartamentos", _verbose=self.verbose)
-                return set()
+            with open(archivo, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if (url := line.strip()):
+                        bloom.add(url)
         except Exception as e:
+            # no persistir un filtro incompleto encima del existente
             _printv(f"⚠️  Error cargando apartamentos visitados: {e}", _verbose=self.verbose)
-            return set()
+            self._persistir_bloom = False
+            return bloom
+
+        _printv(f"✅ Cargadas {len(bloom)} URLs de apartamentos visitados", _verbose=self.verbose)
+        self.apartamentos_visitados = bloom
+        self._visitados_modificado = True
+        self._guardar_bloom_visitados()
+        return bloom
+
+    def _guardar_bloom_visitados(self) -> None:
+        """Persiste el Bloom filter si cambió durante la ejecución."""
+        if not self._visitados_modificado or not self._persistir_bloom:
+            return
+
+        _, archivo_bloom = self._archivos_historial()
+        try:
+            with self._lock_visitados:
+                tmp = archivo_bloom + '.tmp'
+                with open(tmp, 'wb') as f:
+                    self.apartamentos_visitados.tofile(f)
+                os.replace(tmp, archivo_bloom)
+                self._visitados_modificado = False
+        except Exception as e:
+            _printv(f"⚠️  Error guardando filtro de visitados: {e}", _verbose=self.verbose)
 
     def _guardar_apartamento_visitado(self, url: str) -> None:
         """Guarda una URL de apartamento como visitada."""
         if not self.duplicados_config.get('filtrar_duplicados', True):
             return
 
-        archivo = self.duplicados_config.get('archivo_visitados', 'apartamentos_visitados.txt')
         try:
-            with open(archivo, 'a', encoding='utf-8') as f:
-                f.write(url + '\n')
-            self.apartamentos_visitados.add(url)
+            with self._lock_visitados:
+                # el .txt queda sólo como registro auditable; el filtro es la fuente de verdad
+                if self._visited_fh is None:
+                    archivo, _ = self._archivos_historial()
+                    self._visited_fh = open(archivo, 'a', encoding='utf-8', buffering=1 << 16)
+                self._visited_fh.write(url + '\n')
+                self.apartamentos_visitados.add(url)
+                self._visitados_modificado = True
         except Exception as e:
             _printv(f"⚠️  Error guardando apartamento visitado: {e}", _verbose=self.verbose)
 
+    def _flush_visitados(self) -> None:
+        """Vuelca a disco las URLs visitadas pendientes y el filtro (una vez por página)."""
+        with self._lock_visitados:
+            if self._visited_fh is not None:
+                self._visited_fh.flush()
+            # después del .txt, así el .bloom queda igual o más nuevo que él
+            self._guardar_bloom_visitados()
+
+    def _cerrar_archivo_visitados(self) -> None:
+        with self._lock_visitados:
+            if self._visited_fh is not None:
+                self._visited_fh.close()
+                self._visited_fh = None
+
     def _es_apartamento_nuevo(self, url: str) -> bool:
         """Verifica si el apartamento es nuevo (no visitado anteriormente)."""
         if not self.duplicados_config.get('filtrar_duplicados', True):
             return True
-        return url not in self.apartamentos_visitados
+        with self._lock_visitados:
+            return url not in self.apartamentos_visitados
+
+    def _cargar_cookies(self) -> MozillaCookieJar:
+        """Carga las cookies de la ejecución anterior, si existen."""
+        jar = MozillaCookieJar(self.archivo_cookies)
+        try:
+            if os.path.exists(self.archivo_cookies):
+                jar.load(ignore_discard=True)
+                _printv(f"✅ Cargadas {len(jar)} cookies de {self.archivo_cookies}", _verbose=self.verbose)
+        except (LoadError, OSError) as e:
+            _printv(f"⚠️  Error cargando cookies: {e}", _verbose=self.verbose)
+        return jar
+
+    def _guardar_cookies(self) -> None:
+        try:
+            self._cookie_jar.save(ignore_discard=True)
+        except OSError as e:
+            _printv(f"⚠️  Error guardando cookies: {e}", _verbose=self.verbose)
+
+    def _abrir_cache_gastos(self) -> Optional[sqlite3.Connection]:
+        """Abre (o crea) la cache SQLite de gastos comunes por URL."""
+        archivo = self.gastos_config.get('archivo_cache', 'gastos_cache.sqlite')
+        try:
+            conn = sqlite3.connect(archivo, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gastos (url TEXT PRIMARY KEY, valor INTEGER, ts INTEGER)"
+            )
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            _printv(f"⚠️  Error abriendo cache de gastos comunes: {e}", _verbose=self.verbose)
+            return None
+
+    def _leer_cache_gastos(self, url: str) -> tuple[bool, Optional[int]]:
+        """Devuelve (encontrado, valor); entradas más viejas que `dias_cache` no cuentan."""
+        if self._cache_gastos is None:
+            return False, None
+
+        limite = int(time.time()) - int(self.gastos_config.get('dias_cache', 7)) * 86400
+        try:
+            with self._lock_cache_gastos:
+                fila = self._cache_gastos.execute(
+                    "SELECT valor FROM gastos WHERE url = ? AND ts > ?", (url, limite)
+                ).fetchone()
+        except sqlite3.Error as e:
+            _printv(f"    ⚠️  Error leyendo cache de gastos comunes: {e}", _verbose=self.verbose)
+            return False, None
+        return (True, fila[0]) if fila else (False, None)
+
+    def _escribir_cache_gastos(self, url: str, valor: Optional[int]) -> None:
+        """Encola la fila; se escribe en lote con `_volcar_cache_gastos` (un commit por página)."""
+        if self._cache_gastos is None:
+            return
+
+        with self._lock_cache_gastos:
+            self._cache_pendientes.append((url, valor, int(time.time())))
+
+    def _volcar_cache_gastos(self) -> None:
+        with self._lock_cache_gastos:
+            if self._cache_gastos is None or not self._cache_pendientes:
+                return
+            filas, self._cache_pendientes = self._cache_pendientes, []
+            try:
+                self._cache_gastos.executemany(
+                    "INSERT OR REPLACE INTO gastos (url, valor, ts) VALUES (?, ?, ?)", filas
+                )
+                self._cache_gastos.commit()
+            except sqlite3.Error as e:
+                _printv(f"    ⚠️  Error guardando cache de gastos comunes: {e}", _verbose=self.verbose)
+
+    def _cerrar_cache_gastos(self) -> None:
+        self._volcar_cache_gastos()
+        with self._lock_cache_gastos:
+            if self._cache_gastos is not None:
+                self._cache_gastos.close()
+                self._cache_gastos = None
 
     # ------------------------------------------------------------------
     # helpers de bajo nivel
@@ -175,99 +478,213 @@ class BuscadorMercadoLibre:
                 "q=0.9,image/avif,image/webp,*/*;q=0.8"
             ),
             "Accept-Language": "es-ES,es;q=0.9",
-            "Connection": "keep-alive",
         }
-        self.session.headers.update(headers)
+        self.client.headers.update(headers)
+
+    def _espera_reintento(self, response: httpx.Response, intento: int) -> Optional[float]:
+        """Segundos a esperar antes de reintentar (respeta Retry-After), o None si no corresponde."""
+        if response.status_code not in self.ESTADOS_REINTENTO or intento >= self.REINTENTOS:
+            return None
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self._backoff(intento)
+
+    @staticmethod
+    def _backoff(intento: int) -> float:
+        return 1.5 * (2 ** intento)
+
+    def _get_listado(self, url: str, timeout: float) -> tuple[int, bytes]:
+        """GET de una página de listado con reintentos; devuelve (status, contenido)."""
+        for intento in range(self.REINTENTOS + 1):
+            try:
+                response = self.client.get(url, timeout=timeout)
+            except httpx.TransportError as exc:
+                # el transporte sólo reintenta errores de conexión; lecturas/streams cortados acá
+                if intento >= self.REINTENTOS:
+                    raise
+                espera = self._backoff(intento)
+                _printv(f"   🔄 intento {intento+1}/{self.REINTENTOS + 1} falló ({exc!r}) → reintento en {espera:.0f} s", _verbose=self.verbose)
+                time.sleep(espera)
+                continue
+            if (espera := self._espera_reintento(response, intento)) is None:
+                break
+            _printv(f"   ⏳ {response.status_code} → reintento en {espera:.0f} s", _verbose=self.verbose)
+            if response.status_code == 429:
+                self._actualizar_headers()  # sólo se cambia de User-Agent ante un 429
+            time.sleep(espera)
+
+        return response.status_code, response.content
 
     # --------------------------------------------------------------
     # regex helpers
     # --------------------------------------------------------------
 
-    _RE_PRECIO_PESOS = re.compile(r"\$\s*([\d.]+)")
-    _RE_PRECIO_USD = re.compile(r"US\$\s*(\d+)")
-    _RE_AREA = re.compile(r"(\d+)\s*m[²2]", re.I)
-    _RE_DORM = re.compile(r"(\d+)\s*dorm", re.I)
+    # dormitorios, área y precios en una sola pasada sobre el texto del listado
+    _RE_LISTING = re.compile(
+        r"(?P<dorm>\d+)\s*dorm|(?P<area>\d+)\s*m[²2]|\$\s*(?P<pesos>[\d.]+)|US\$\s*(?P<usd>\d+)",
+        re.I,
+    )
     _RE_GASTOS_COMUNES = re.compile(r"gastos comunes.*?\$\s*([\d.]+)", re.I)
+    _RE_GASTOS_COMUNES_BYTES = re.compile(rb"gastos comunes[^$]{0,80}\$\s*([\d.]+)", re.I)
+
+    # equivalente a 'p.ui-pdp-maintenance-fee-ltr, .ui-pdp-container__row--maintenance-fee-vis p,
+    # *[id*="maintenance"]', evaluado sobre cada elemento a medida que se cierra
+    _XP_ES_GASTOS = etree.XPath(
+        f"self::p[{_xp_clase('ui-pdp-maintenance-fee-ltr')}]"
+        f" or self::p[ancestor::*[{_xp_clase('ui-pdp-container__row--maintenance-fee-vis')}]]"
+        " or self::*[contains(@id, 'maintenance')]"
+    )
 
     def _extraer_precio(self, texto: str) -> Optional[int]:
         if not texto:
             return None
-        if (m := self._RE_PRECIO_PESOS.search(texto)):
-            return int(m.group(1).replace(".", ""))
-        if (m := self._RE_PRECIO_USD.search(texto)):
-            return int(m.group(1)) * 40  # conversión estimada USD→UYU a dia de 10/08/2025
+        usd = None
+        for m in self._RE_LISTING.finditer(texto):
+            if m.lastgroup == "pesos":
+                return int(m.group("pesos").replace(".", ""))
+            if m.lastgroup == "usd" and usd is None:
+                usd = int(m.group("usd"))
+        if usd is not None:
+            return usd * 40  # conversión estimada USD→UYU a dia de 10/08/2025
         return None
 
-    def _extraer_gastos_comunes_desde_pagina(self, url: str) -> Optional[int]:
+    async def _extraer_gastos_comunes_desde_pagina(self, client: httpx.AsyncClient, url: str) -> Optional[int]:
         """Extrae gastos comunes desde la página individual del apartamento."""
         if not url or not self.obtener_gastos_comunes:
             return None
 
+        encontrado, gastos_cacheados = self._leer_cache_gastos(url)
+        if encontrado:
+            _printv(f"    💾 Gastos comunes desde cache: {gastos_cacheados}", _verbose=self.verbose)
+            return gastos_cacheados
+
         try:
             _printv(f"    💰 Obteniendo gastos comunes de: {url}", _verbose=self.verbose)
 
-            # Request a la página individual
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                _printv(f"    ⚠️  Error {response.status_code} al obtener página individual", _verbose=self.verbose)
-                return None
+            # Request a la página individual (en streaming: se corta al encontrar los gastos)
+            for intento in range(self.REINTENTOS + 1):
+                await self._limitador_detalles.esperar_async()
+                # mismo User-Agent que el cliente sync (puede haber rotado por un 429)
+                ua = {"User-Agent": self.client.headers["User-Agent"]}
+                async with client.stream("GET", url, headers=ua) as response:
+                    espera = self._espera_reintento(response, intento)
+                    if espera is None:
+                        if response.status_code != 200:
+                            _printv(f"    ⚠️  Error {response.status_code} al obtener página individual", _verbose=self.verbose)
+                            return None
+
+                        gastos_valor, es_pdp = await self._parsear_gastos_comunes(response.aiter_bytes(65536))
+                        break
+                await asyncio.sleep(espera)
 
-            soup = BeautifulSoup(response.content, "html.parser")
+            # un "sin gastos" sólo se cachea si era una página de aviso real (no un bloqueo)
+            if gastos_valor is not None or es_pdp:
+                self._escribir_cache_gastos(url, gastos_valor)
+            return gastos_valor
 
-            # Buscar gastos comunes con selectores específicos
-            gastos_elemento = soup.select_one('p.ui-pdp-maintenance-fee-ltr, .ui-pdp-container__row--maintenance-fee-vis p, *[id*="maintenance"]')
+        except Exception as exc:
+            _printv(f"    ⚠️  Error obteniendo gastos comunes: {exc}", _verbose=self.verbose)
+            return None
 
-            if gastos_elemento:
-                gastos_texto = gastos_elemento.get_text(strip=True)
+    async def _parsear_gastos_comunes(self, chunks: AsyncIterator[bytes]) -> tuple[Optional[int], bool]:
+        """Busca el monto de gastos comunes alimentando el HTML por partes.
+
+        Deja de consumir `chunks` apenas se cierra el elemento de gastos comunes.
+        Devuelve (monto, es_pdp); `es_pdp` indica que era una página de aviso de ML
+        (y no, p.ej., una verificación anti-bot).
+        """
+        parser = etree.HTMLPullParser(events=("end",), encoding="utf-8")
+        leidos: List[bytes] = []
+
+        async for chunk in chunks:
+            leidos.append(chunk)
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                # filtro barato en Python; el XPath (que recorre ancestros) sólo para candidatos
+                if elem.tag != "p" and "maintenance" not in (elem.get("id") or ""):
+                    continue
+                if not self._XP_ES_GASTOS(elem):
+                    continue
+
+                gastos_texto = "".join(t.strip() for t in elem.itertext())
                 _printv(f"    💰 Texto gastos encontrado: {gastos_texto}", _verbose=self.verbose)
 
                 # Usar regex mejorado para extraer el número
                 if (m := self._RE_GASTOS_COMUNES.search(gastos_texto)):
                     gastos_valor = int(m.group(1).replace(".", ""))
                     _printv(f"    ✅ Gastos comunes: ${gastos_valor}", _verbose=self.verbose)
-                    return gastos_valor
+                    return gastos_valor, True
                 else:
                     _printv(f"    ⚠️  Regex no coincidió con: {gastos_texto}", _verbose=self.verbose)
 
-            # Fallback: buscar en todo el texto de la página
-            texto_completo = soup.get_text(" ", strip=True)
-            if (m := self._RE_GASTOS_COMUNES.search(texto_completo)):
-                gastos_valor = int(m.group(1).replace(".", ""))
-                _printv(f"    ✅ Gastos comunes (fallback): ${gastos_valor}", _verbose=self.verbose)
-                return gastos_valor
-            else:
-                _printv(f"    ⚠️  Regex fallback tampoco coincidió", _verbose=self.verbose)
-
-            _printv(f"    ❌ No se encontraron gastos comunes", _verbose=self.verbose)
-            return None
-
-        except Exception as exc:
-            _printv(f"    ⚠️  Error obteniendo gastos comunes: {exc}", _verbose=self.verbose)
-            return None
+        # Fallback: regex directo sobre el HTML crudo (sin armar el texto del DOM)
+        html = b"".join(leidos)
+        es_pdp = b"ui-pdp" in html
+        monto = None
+        if (m := self._RE_GASTOS_COMUNES_BYTES.search(html)):
+            monto = m.group(1).decode("ascii")
+        elif (m := self._RE_GASTOS_COMUNES.search(html.decode("utf-8", "replace"))):
+            monto = m.group(1)
+
+        if monto:
+            gastos_valor = int(monto.replace(".", ""))
+            _printv(f"    ✅ Gastos comunes (fallback): ${gastos_valor}", _verbose=self.verbose)
+            return gastos_valor, es_pdp
+        else:
+            _printv(f"    ⚠️  Regex fallback tampoco coincidió", _verbose=self.verbose)
+
+        _printv(f"    ❌ No se encontraron gastos comunes", _verbose=self.verbose)
+        return None, es_pdp
 
     def _tiene_palabras_excluidas(self, texto: str) -> bool:
         texto = texto.lower()
         return any(p in texto for p in self._palabras_excluir)
 
+    # --------------------------------------------------------------
+    # XPath precompilados para el listado
+    # --------------------------------------------------------------
+
+    _XP_CONTENEDORES = etree.XPath(
+        f"//li[{_xp_clase('ui-search-layout__item')}] | //*[{_xp_clase('ui-search-result')}]"
+    )
+    _XP_URL = [
+        etree.XPath(f".//a[{_xp_clase('ui-search-link')}]/@href"),
+        etree.XPath(".//a/@href"),
+    ]
+    _XP_TITULO = [
+        etree.XPath(f".//h2[{_xp_clase('ui-search-item__title')}]"),
+        etree.XPath(f".//div[{_xp_clase('ui-search-item__highlight-label')}]"),
+        etree.XPath(f".//a[{_xp_clase('ui-search-link')}][@title]"),
+        etree.XPath(f".//h2[{_xp_clase('ui-search-item__group__element')}]"),
+    ]
+    _XP_FRAC = etree.XPath(f".//span[{_xp_clase('andes-money-amount__fraction')}]")
+    _XP_CENTS = etree.XPath(f".//span[{_xp_clase('andes-money-amount__cents')}]")
+    _XP_PRECIO = [
+        etree.XPath(f".//span[{_xp_clase('price-tag-fraction')}]"),
+        etree.XPath(f".//span[{_xp_clase('ui-search-price__part--second-line')}]"),
+    ]
+    _XP_ATRIBUTOS = etree.XPath(f".//ul[{_xp_clase('ui-search-card-attributes')}]")
+    _XP_UBICACION = [
+        etree.XPath(f".//span[{_xp_clase('ui-search-item__location')}]"),
+        etree.XPath(f".//span[{_xp_clase('ui-search-item__location-label')}]"),
+    ]
+
     # --------------------------------------------------------------
     # mini‑helpers para el extractor
     # --------------------------------------------------------------
 
     @staticmethod
-    def _pick_first(node, selectors, *, attr: str | None = None) -> str:
+    def _pick_first(node, xpaths) -> str:
         """Devuelve el primer texto o atributo no vacío encontrado."""
-        for sel in selectors:
-            tag = node.select_one(sel)
-            if not tag:
+        for xp in xpaths:
+            res = xp(node)
+            if not res:
                 continue
-            if attr:
-                val = tag.get(attr, "").strip()
-                if val:
-                    return val
-            else:
-                txt = tag.get_text(" ", strip=True)
-                if txt:
-                    return txt
+            primero = res[0]
+            val = primero.strip() if isinstance(primero, str) else _texto_nodo(primero)
+            if val:
+                return val
         return ""
 
     @staticmethod
@@ -304,42 +721,32 @@ class BuscadorMercadoLibre:
 
         for pagina in range(1, self.max_paginas + 1):
             _printv(f"📄 Página {pagina} - {barrio}…", _verbose=self.verbose)
-            self._actualizar_headers()
 
             # ML usa offset en la *ruta* (no query‑string)
             url = url_base if pagina == 1 else f"{url_base}_Desde_{(pagina-1)*50}"
             _printv(f"   🌐 URL   : {url}", _verbose=self.verbose)
 
-            # -------- request con reintentos básicos --------
-            response: Optional[requests.Response] = None
-            for intento in range(3):
-                try:
-                    response = self.session.get(url, timeout=30)
-                    if response.status_code == 200:
-                        break
-                    if response.status_code == 429:
-                        _printv("   ⏳ 429 → pause 15 s", _verbose=self.verbose)
-                        time.sleep(15)
-                    elif response.status_code in {403, 404}:
-                        _printv(f"   🚫 {response.status_code} → rompo", _verbose=self.verbose)
-                        return resultados
-                    else:
-                        _printv(f"   ⚠️  status {response.status_code}", _verbose=self.verbose)
-                        time.sleep(5)
-                except requests.RequestException as exc:
-                    _printv(f"   🔄 intento {intento+1}/3 fail: {exc}", _verbose=self.verbose)
-                    time.sleep(5)
-
-            if not response or response.status_code != 200:
-                _printv("   ❌ sin respuesta 200", _verbose=self.verbose)
+            # -------- request (reintentos en _get_listado) --------
+            try:
+                status, contenido = self._get_listado(url, timeout=30)
+            except httpx.HTTPError as exc:
+                _printv(f"   ❌ request falló: {exc}", _verbose=self.verbose)
                 break
 
-            if len(response.content) < 1000:
+            if status in {403, 404}:
+                _printv(f"   🚫 {status} → rompo", _verbose=self.verbose)
+                return resultados
+
+            if status != 200:
+                _printv(f"   ❌ sin respuesta 200 (status {status})", _verbose=self.verbose)
+                break
+
+            if len(contenido) < 1000:
                 _printv("   ⚠️  respuesta muy pequeña (posible bloqueo)", _verbose=self.verbose)
                 break
 
             # ------------- parseo ------------
-            nuevos = self._parsear_pagina_ml(response.content, barrio)
+            nuevos = self._parsear_pagina_ml(contenido, barrio)
             _printv(f"   ✅ {len(nuevos)} aptos en página", _verbose=self.verbose)
             resultados.extend(nuevos)
 
@@ -355,22 +762,90 @@ class BuscadorMercadoLibre:
     # --------------------------------------------------------------
 
     def _parsear_pagina_ml(self, html: bytes, barrio: str) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html, "html.parser")
+        # ML sirve siempre UTF-8; sin esto lxml asume latin-1 si falta el <meta charset>
+        root = lxml_html.fromstring(html, parser=lxml_html.HTMLParser(encoding="utf-8"))
 
         # selector prioritario → menos ruido
-        contenedores = soup.select("li.ui-search-layout__item, .ui-search-result")
+        contenedores = self._XP_CONTENEDORES(root)
         if self.verbose:
             _printv(f"   🎯 {len(contenedores)} contenedores", _verbose=True)
 
         apartamentos: List[Dict[str, Any]] = []
         for cont in contenedores:
             apt = self._extraer_apartamento_ml(cont, barrio)
-            if apt and self._cumple_criterios_ml(apt):
+            if not apt:
+                continue
+            # chequeo + guardado atómicos: otro barrio puede traer la misma URL
+            with self._lock_visitados:
+                if not self._cumple_criterios_ml(apt):
+                    continue
                 # Guardar como visitado
                 self._guardar_apartamento_visitado(apt.get("url", ""))
-                apartamentos.append(apt)
+            apartamentos.append(apt)
+
+        self._flush_visitados()
+        self._completar_gastos_comunes(apartamentos)
         return apartamentos
 
+    def _completar_gastos_comunes(self, apartamentos: List[Dict[str, Any]]) -> None:
+        """Obtiene en paralelo los gastos comunes y recalcula el precio total."""
+        if not self.obtener_gastos_comunes:
+            return
+
+        con_url = [apt for apt in apartamentos if apt.get("url")]
+        if not con_url:
+            return
+
+        asyncio.run_coroutine_threadsafe(
+            self._completar_gastos_async(con_url), self._loop_async()
+        ).result()
+
+    def _loop_async(self) -> asyncio.AbstractEventLoop:
+        """Loop en un hilo propio; todos los barrios y páginas comparten su AsyncClient."""
+        with self._lock_loop:
+            if self._loop_gastos is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="gastos-comunes", daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._crear_cliente_async(), loop).result()
+                self._loop_gastos = loop
+            return self._loop_gastos
+
+    async def _crear_cliente_async(self) -> None:
+        self._sem_gastos = asyncio.Semaphore(self.MAX_DETALLES_CONCURRENTES)
+        self._client_async = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=self.REINTENTOS,
+                limits=httpx.Limits(max_connections=self.MAX_DETALLES_CONCURRENTES),
+            ),
+            headers=self.client.headers,
+            cookies=self._cookie_jar,
+            timeout=15,
+            follow_redirects=True,
+        )
+
+    def _cerrar_clientes(self) -> None:
+        self.client.close()
+        with self._lock_loop:
+            if self._loop_gastos is not None:
+                asyncio.run_coroutine_threadsafe(self._client_async.aclose(), self._loop_gastos).result()
+                self._loop_gastos.call_soon_threadsafe(self._loop_gastos.stop)
+                self._loop_gastos = None
+
+    async def _completar_gastos_async(self, apartamentos: List[Dict[str, Any]]) -> None:
+        async def completar(apt: Dict[str, Any]) -> None:
+            async with self._sem_gastos:
+                apt["gastos_comunes"] = await self._extraer_gastos_comunes_desde_pagina(
+                    self._client_async, apt["url"]
+                )
+            apt["precio_total_formatted"] = self._calcular_precio_total(
+                apt["precio_alquiler"], apt["gastos_comunes"]
+            )
+
+        await asyncio.gather(*(completar(apt) for apt in apartamentos))
+        # commit (fsync) fuera del loop para no frenar las descargas de otros barrios
+        await asyncio.to_thread(self._volcar_cache_gastos)
+
     # --------------------------------------------------------------
     # extracción individual (robusta)
     # --------------------------------------------------------------
@@ -378,78 +853,40 @@ class BuscadorMercadoLibre:
     def _extraer_apartamento_ml(self, cont, barrio: str) -> Optional[Dict[str, Any]]:
         try:
             # ------------ URL ------------
-            url = self._pick_first(cont, ["a.ui-search-link", "a"], attr="href").split("#")[0]
+            url = self._pick_first(cont, self._XP_URL).split("#")[0]
 
             # ------------ título ------------
-            titulo = self._pick_first(
-                cont,
-                [
-                    "h2.ui-search-item__title",
-                    "div.ui-search-item__highlight-label",
-                    "a.ui-search-link[title]",
-                    "h2.ui-search-item__group__element",
-                ],
-            )
+            titulo = self._pick_first(cont, self._XP_TITULO)
             if not titulo:
                 titulo = self._slug_from_url(url)
 
             # ------------ precio ------------
-            frac = cont.select_one("span.andes-money-amount__fraction")
-            cents = cont.select_one("span.andes-money-amount__cents")
+            frac = self._XP_FRAC(cont)
+            cents = self._XP_CENTS(cont)
             if frac:
-                precio_alquiler = frac.text + ("," + cents.text if cents else "")
+                precio_alquiler = frac[0].text_content() + ("," + cents[0].text_content() if cents else "")
             else:
-                precio_alquiler = self._pick_first(
-                    cont,
-                    [
-                        "span.price-tag-fraction",
-                        "span.ui-search-price__part--second-line",
-                    ],
-                )
+                precio_alquiler = self._pick_first(cont, self._XP_PRECIO)
 
             # ------------ ubicación ------------
-            ubicacion = self._pick_first(
-                cont,
-                [
-                    "span.ui-search-item__location",
-                    "span.ui-search-item__location-label",
-                ],
-            )
+            ubicacion = self._pick_first(cont, self._XP_UBICACION)
 
             # ------------ dormitorios & área ------------
-            texto = cont.get_text(" ", strip=True).lower()
-            dormitorios = int(m.group(1)) if (m := self._RE_DORM.search(texto)) else None
-            area = f"{m.group(1)} m2" if (m := self._RE_AREA.search(texto)) else ""
-
-            # ------------ gastos comunes (desde página individual) ------------
+            # sólo la lista de atributos (dorm., m²); todo el contenedor si no existe
+            atributos = self._XP_ATRIBUTOS(cont)
+            texto = _texto_nodo(atributos[0] if atributos else cont).lower()
+            dormitorios, area = None, ""
+            for m in self._RE_LISTING.finditer(texto):
+                if m.lastgroup == "dorm" and dormitorios is None:
+                    dormitorios = int(m.group("dorm"))
+                elif m.lastgroup == "area" and not area:
+                    area = f"{m.group('area')} m2"
+                if dormitorios is not None and area:
+                    break
+
+            # gastos comunes: se completan después, en paralelo (ver _completar_gastos_comunes)
             gastos_comunes = None
-            if self.obtener_gastos_comunes and url:
-                gastos_comunes = self._extraer_gastos_comunes_desde_pagina(url)
-                # Pausa entre requests a páginas individuales
-                time.sleep(random.uniform(2, 4))
-
-            # ------------ calcular precio total ------------
-            def parse_miles(valor):
-                """Convierte un string con separador de miles o un int a entero."""
-                if valor is None:
-                    return 0
-                return int(str(valor).replace('.', ''))
-
-            def format_miles(numero):
-                """Formatea un entero con punto como separador de miles."""
-                return f"{numero:,}".replace(',', '.')
-
-            # Mantener precio_total como número para comparaciones
-            precio_total_numerico = None
-            precio_total_formateado = None
-
-            if precio_alquiler is not None:
-                precio_total_numerico = parse_miles(precio_alquiler)
-                if gastos_comunes is not None:
-                    precio_total_numerico += parse_miles(gastos_comunes)
-
-                # Solo formatear cuando necesites mostrar el valor
-                precio_total_formateado = format_miles(precio_total_numerico)
+            precio_total_formateado = self._calcular_precio_total(precio_alquiler, gastos_comunes)
 
             return {
                 "titulo": titulo,
@@ -466,6 +903,22 @@ class BuscadorMercadoLibre:
             _printv(f"   ⚠️  error extraer: {exc}", _verbose=self.verbose)
             return None
 
+    def _calcular_precio_total(self, precio_alquiler: Optional[str], gastos_comunes: Optional[int]) -> Optional[str]:
+        """Suma alquiler + gastos comunes y lo devuelve con separador de miles."""
+        # Mantener precio_total como número para comparaciones
+        precio_total_numerico = None
+        precio_total_formateado = None
+
+        if precio_alquiler is not None:
+            precio_total_numerico = _parse_miles(precio_alquiler)
+            if gastos_comunes is not None:
+                precio_total_numerico += _parse_miles(gastos_comunes)
+
+            # Solo formatear cuando necesites mostrar el valor
+            precio_total_formateado = _format_miles(precio_total_numerico)
+
+        return precio_total_formateado
+
     # --------------------------------------------------------------
     # filtros
     # --------------------------------------------------------------
@@ -488,22 +941,24 @@ class BuscadorMercadoLibre:
     def buscar(self) -> List[Dict[str, Any]]:
         """Busca apartamentos en todos los barrios definidos."""
         todos_resultados: List[Dict[str, Any]] = []
+        por_barrio: Dict[str, List[Dict[str, Any]]] = {}
 
-        for barrio_key, barrio_value in self.BARRIOS.items():
-            _printv(f"\n🔍 Iniciando búsqueda en {barrio_key}...", _verbose=self.verbose)
-
-            try:
-                resultados_barrio = self.buscar_en_barrio(barrio_value)
-                todos_resultados.extend(resultados_barrio)
+        with ThreadPoolExecutor(max_workers=self.MAX_HILOS_BARRIOS) as ex:
+            futures = {}
+            for barrio_key, barrio_value in self.BARRIOS.items():
+                _printv(f"\n🔍 Iniciando búsqueda en {barrio_key}...", _verbose=self.verbose)
+                futures[ex.submit(self.buscar_en_barrio, barrio_value)] = barrio_key
 
-                # Pausa entre barrios para no sobrecargar el servidor
-                if barrio_key != list(self.BARRIOS.keys())[-1]:  # No pausar después del último
-                    _printv(f"⏳ Pausa entre barrios...", _verbose=self.verbose)
-                    time.sleep(random.uniform(10, 15))
+            for future in as_completed(futures):
+                barrio_key = futures[future]
+                try:
+                    por_barrio[barrio_key] = future.result()
+                except Exception as exc:
+                    _printv(f"❌ Error en barrio {barrio_key}: {exc}", _verbose=self.verbose)
 
-            except Exception as exc:
-                _printv(f"❌ Error en barrio {barrio_key}: {exc}", _verbose=self.verbose)
-                continue
+        # Mantener el orden de los barrios de la configuración
+        for barrio_key in self.BARRIOS:
+            todos_resultados.extend(por_barrio.get(barrio_key, []))
 
         _printv(f"\n🎉 Total de apartamentos encontrados: {len(todos_resultados)}", _verbose=self.verbose)
         return todos_resultados
@@ -552,21 +1007,20 @@ def main() -> None:
 
     # Limpiar historial si se solicita
     if args.limpiar_historial:
-        archivo = buscador.duplicados_config.get('archivo_visitados', 'apartamentos_visitados.txt')
-        try:
-            if os.path.exists(archivo):
-                os.remove(archivo)
-                print(f"✅ Historial limpiado: {archivo}")
-            else:
-                print(f"ℹ️  No hay historial que limpiar: {archivo}")
-        except Exception as e:
-            print(f"❌ Error limpiando historial: {e}")
+        for archivo in buscador._archivos_historial():
+            try:
+                if os.path.exists(archivo):
+                    os.remove(archivo)
+                    print(f"✅ Historial limpiado: {archivo}")
+                else:
+                    print(f"ℹ️  No hay historial que limpiar: {archivo}")
+            except Exception as e:
+                print(f"❌ Error limpiando historial: {e}")
         return
 
     # Deshabilitar filtro de duplicados si se solicita
     if args.sin_filtro_duplicados:
         buscador.duplicados_config['filtrar_duplicados'] = False
-        buscador.apartamentos_visitados = set()
 
     if args.barrio:
         # Buscar en un barrio específico
@@ -575,8 +1029,10 @@ def main() -> None:
         # Buscar en todos los barrios
         apartamentos = buscador.buscar()
 
-    for apt in apartamentos:
-        sys.stdout.write(json.dumps(apt, ensure_ascii=False) + "\n")
+    # bytes directo al buffer de stdout: sin encoder de texto por línea
+    sys.stdout.flush()  # lo ya impreso en modo verbose va antes
+    sys.stdout.buffer.writelines(_json_dumps(apt) + b"\n" for apt in apartamentos)
+    sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":